@@ -1,3 +1,4 @@
+from pathlib import Path
 from flask import Flask
 from loguru import logger
 
@@ -5,7 +6,13 @@ from app.config import get_config
 from app.extensions import init_extensions
 
 
-def create_app() -> Flask:
+def create_app(load_services: bool = True) -> Flask:
+    """Build the Flask app.
+
+    ``load_services=False`` skips the analysis pipeline, the log file sink and
+    the upload sweeper, for processes that never serve requests (such as
+    the debug reloader's file-watching parent).
+    """
     # Load configuration with fail-fast validation
     try:
         settings = get_config()
@@ -21,10 +28,21 @@ def create_app() -> Flask:
     app.config['SECRET_KEY'] = settings.SECRET_KEY
     app.config['MAX_CONTENT_LENGTH'] = settings.MAX_CONTENT_LENGTH
     app.config['UPLOAD_FOLDER'] = settings.UPLOAD_FOLDER
+    app.config['UPLOAD_DIR'] = Path(settings.UPLOAD_FOLDER).resolve()
+    # Temp uploads get their own subdirectory: the sweeper deletes stale
+    # PDFs there and must never touch anything else in UPLOAD_FOLDER
+    app.config['UPLOAD_TMP_DIR'] = app.config['UPLOAD_DIR'] / "tmp"
+    app.config['UPLOAD_TMP_DIR'].mkdir(parents=True, exist_ok=True)
     app.config['SETTINGS'] = settings
 
     # Initialize extensions
-    init_extensions(app)
+    init_extensions(app, background=load_services)
+
+    # Build the analysis pipeline once; the embedding model and LLM client
+    # are expensive to construct and are reused by every request
+    if load_services:
+        from app.services.pipeline import AnalysisPipeline
+        app.config['PIPELINE'] = AnalysisPipeline(settings)
 
     # Register blueprints
     from app.blueprints.main import main_bp
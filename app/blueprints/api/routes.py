@@ -1,13 +1,20 @@
 import os
-from flask import Blueprint, request, jsonify, current_app
-from werkzeug.utils import secure_filename
+import orjson
+from flask import Blueprint, Response, request, jsonify, current_app
 from loguru import logger
 
 from app.utils.validators import validate_pdf, validate_file_size
-from app.services.pipeline import AnalysisPipeline
+from app.utils.helpers import save_stream_with_hash
 
 api_bp = Blueprint('api', __name__)
 
+
+def _orjson_response(payload: dict, status: int = 200) -> Response:
+    """Serialize with orjson; handles enums natively and numpy scalars/arrays."""
+    body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return Response(body, status=status, mimetype='application/json')
+
+
 @api_bp.route('/analyze', methods=['POST'])
 def analyze():
     # Check if file is present
@@ -27,46 +34,30 @@ def analyze():
     if not is_valid:
         return jsonify({'error': error_msg}), 400
 
-    # Secure filename
-    original_filename = secure_filename(file.filename)
+    # Original name is only used for logging and the response, never the filesystem
+    original_filename = file.filename
 
-    # Save file temporarily
-    import time
-    timestamp = int(time.time() * 1000)
-    temp_filename = f"{timestamp}_{original_filename}"
-    filepath = os.path.join(settings.UPLOAD_FOLDER, temp_filename)
+    # Save file temporarily under a random, collision-free name
+    temp_filename = os.urandom(8).hex() + '.pdf'
+    filepath = str(current_app.config['UPLOAD_TMP_DIR'] / temp_filename)
 
     try:
-        # Save uploaded file
-        file.save(filepath)
+        # Stream upload to disk, hashing as we write
+        doc_id = save_stream_with_hash(file.stream, filepath)
         logger.info(f"File saved: {temp_filename}")
 
-        # Initialize pipeline
-        pipeline = AnalysisPipeline(settings)
+        # Reuse the pipeline built at startup
+        pipeline = current_app.config['PIPELINE']
 
         # Run analysis
         logger.info(f"Starting analysis for: {original_filename}")
-        result = pipeline.analyze_document(filepath, original_filename)
+        result = pipeline.analyze_document(filepath, original_filename, doc_id=doc_id)
 
-        # Clean up uploaded file
-        try:
-            os.remove(filepath)
-            logger.info(f"Cleaned up temp file: {temp_filename}")
-        except Exception as e:
-            logger.warning(f"Failed to delete temp file: {e}")
-
-        return jsonify(result), 200
+        # Temp file is removed later by the upload sweeper
+        return _orjson_response(result, 200)
 
     except Exception as e:
         logger.error(f"Analysis failed: {e}")
-
-        # Clean up on error
-        try:
-            if os.path.exists(filepath):
-                os.remove(filepath)
-        except Exception:
-            pass
-
         return jsonify({'error': str(e)}), 500
 
 
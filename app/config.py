@@ -1,88 +1,160 @@
+import os
 import sys
+import json
 import secrets
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
 from pathlib import Path
-from typing import Set
-from pydantic_settings import BaseSettings
-from pydantic import Field, field_validator
+from typing import Any, Dict, Optional, Set
+from dotenv import dotenv_values
 from loguru import logger
 
 
-class Settings(BaseSettings):
+# Directories already created by this process, so repeated Settings()
+# instantiation does not hit the filesystem again
+_ENSURED_DIRS: Set[str] = set()
+
+# Inclusive (min, max) bounds for numeric settings
+_BOUNDS = {
+    'CHUNK_SIZE': (500, 3000),
+    'CHUNK_OVERLAP': (0, 500),
+    'TOP_K_RETRIEVAL': (10, 100),
+    'TOP_K_RERANKED': (5, 50),
+    'FINAL_OUTPUT_COUNT': (5, 20),
+    'FAISS_EF_CONSTRUCTION': (8, 512),
+    'FAISS_EF_SEARCH': (0, 1024),
+}
+
+_TRUE_VALUES = {'1', 'true', 't', 'yes', 'y', 'on'}
+_FALSE_VALUES = {'0', 'false', 'f', 'no', 'n', 'off'}
+
+
+def _parse_bool(value: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in _TRUE_VALUES:
+        return True
+    if lowered in _FALSE_VALUES:
+        return False
+    raise ValueError(f"invalid boolean value: {value!r}")
+
+
+def _parse_set(value: str) -> Set[str]:
+    """Accept a JSON list (``["pdf"]``) or a comma-separated string."""
+    value = value.strip()
+    if value.startswith('['):
+        return set(json.loads(value))
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+_PARSERS = {
+    str: str,
+    int: int,
+    float: float,
+    bool: _parse_bool,
+    Set[str]: _parse_set,
+}
+
+
+@dataclass(frozen=True)
+class Settings:
     """Application settings with environment variable support."""
 
     # Flask Core
-    SECRET_KEY: str = Field(default_factory=lambda: secrets.token_hex(32))
-    FLASK_ENV: str = Field(default="production")
-    DEBUG: bool = Field(default=False)
+    SECRET_KEY: str = field(default_factory=lambda: secrets.token_hex(32))
+    FLASK_ENV: str = "production"
+    DEBUG: bool = False
 
     # API Keys - REQUIRED
-    GROQ_API_KEY: str = Field(...)
-    HUGGINGFACE_API_KEY: str = Field(default="")
+    GROQ_API_KEY: str = ""
+    HUGGINGFACE_API_KEY: str = ""
 
     # LLM Configuration
-    LLM_MODEL: str = Field(default="llama-3.3-70b-versatile")
-    LLM_TEMPERATURE: float = Field(default=0.0)
+    LLM_MODEL: str = "llama-3.3-70b-versatile"
+    LLM_TEMPERATURE: float = 0.0
 
     # Embedding Configuration
-    EMBEDDING_MODEL: str = Field(default="sentence-transformers/all-MiniLM-L6-v2")
-    EMBEDDING_DEVICE: str = Field(default="cpu")
+    EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_DEVICE: str = "cpu"
+    EMBEDDING_CPU_BF16: bool = False
+    EMBEDDING_CACHE_SIZE: int = 10000
+    EMBEDDING_PROCESS_POOL: bool = False
 
     # Processing Parameters
-    CHUNK_SIZE: int = Field(default=1500, ge=500, le=3000)
-    CHUNK_OVERLAP: int = Field(default=200, ge=0, le=500)
-    TOP_K_RETRIEVAL: int = Field(default=60, ge=10, le=100)
-    TOP_K_RERANKED: int = Field(default=25, ge=5, le=50)
-    FINAL_OUTPUT_COUNT: int = Field(default=10, ge=5, le=20)
+    CHUNK_SIZE: int = 1500
+    CHUNK_OVERLAP: int = 200
+    TOP_K_RETRIEVAL: int = 60
+    TOP_K_RERANKED: int = 25
+    FINAL_OUTPUT_COUNT: int = 10
 
     # File Upload
-    UPLOAD_FOLDER: str = Field(default="data/uploads")
-    MAX_CONTENT_LENGTH: int = Field(default=50 * 1024 * 1024)  # 50MB
-    ALLOWED_EXTENSIONS: Set[str] = {'pdf'}
+    UPLOAD_FOLDER: str = "data/uploads"
+    MAX_CONTENT_LENGTH: int = 50 * 1024 * 1024  # 50MB
+    ALLOWED_EXTENSIONS: Set[str] = field(default_factory=lambda: {'pdf'})
 
     # FAISS Index
-    FAISS_M: int = Field(default=32)
-    FAISS_EF_CONSTRUCTION: int = Field(default=64)
-    FAISS_EF_SEARCH: int = Field(default=64)
-
-    @field_validator('SECRET_KEY')
-    @classmethod
-    def validate_secret_key(cls, v: str) -> str:
-        """Ensure SECRET_KEY is secure."""
-        if len(v) < 32:
+    FAISS_M: int = 32
+    FAISS_EF_CONSTRUCTION: int = 40
+    FAISS_EF_SEARCH: int = 0  # 0 = scale with top_k per query
+    FAISS_SQ_TYPE: str = "QT_8bit"
+
+    def __post_init__(self) -> None:
+        # Ensure SECRET_KEY is secure
+        if len(self.SECRET_KEY) < 32:
             raise ValueError("SECRET_KEY must be at least 32 characters")
-        return v
 
-    @field_validator('GROQ_API_KEY')
-    @classmethod
-    def validate_groq_key(cls, v: str) -> str:
-        """Ensure GROQ_API_KEY is provided."""
-        if not v or v == "your-groq-api-key-here":
+        # Ensure GROQ_API_KEY is provided
+        if not self.GROQ_API_KEY or self.GROQ_API_KEY == "your-groq-api-key-here":
             raise ValueError("GROQ_API_KEY missing or invalid")
-        return v
 
-    @field_validator('UPLOAD_FOLDER')
-    @classmethod
-    def create_upload_folder(cls, v: str) -> str:
+        for name, (low, high) in _BOUNDS.items():
+            value = getattr(self, name)
+            if not low <= value <= high:
+                raise ValueError(f"{name} must be between {low} and {high}, got {value}")
+
+        self._create_upload_folder(self.UPLOAD_FOLDER)
+
+    @staticmethod
+    def _create_upload_folder(path: str) -> None:
         """Create upload directory if it doesn't exist."""
+        if path in _ENSURED_DIRS:
+            return
         try:
-            Path(v).mkdir(parents=True, exist_ok=True)
-            logger.info(f"Upload folder ready: {v}")
+            Path(path).mkdir(parents=True, exist_ok=True)
+            _ENSURED_DIRS.add(path)
+            logger.info(f"Upload folder ready: {path}")
         except Exception as e:
-            logger.warning(f"Could not create upload folder '{v}': {e}")
-        return v
-
-    model_config = {
-        "env_file": ".env",
-        "env_file_encoding": "utf-8",
-        "case_sensitive": False,
-        "extra": "ignore"
-    }
-
+            logger.warning(f"Could not create upload folder '{path}': {e}")
 
+    @classmethod
+    def from_env(cls, env_file: Optional[str] = ".env") -> "Settings":
+        """Build settings from a .env file overlaid with the process environment.
+
+        Variable names are matched case-insensitively; unknown names are ignored.
+        """
+        raw: Dict[str, Optional[str]] = {}
+        if env_file and Path(env_file).is_file():
+            raw.update(dotenv_values(env_file, encoding="utf-8"))
+        raw.update(os.environ)
+        env = {key.upper(): value for key, value in raw.items() if value is not None}
+
+        values: Dict[str, Any] = {}
+        for f in fields(cls):
+            if f.name in env:
+                try:
+                    values[f.name] = _PARSERS[f.type](env[f.name])
+                except ValueError as e:
+                    raise ValueError(f"Invalid value for {f.name}: {e}") from e
+        return cls(**values)
+
+
+@lru_cache(maxsize=1)
 def get_config() -> Settings:
-    """Load and validate configuration safely without leaking secrets."""
+    """Load and validate configuration safely without leaking secrets.
+
+    The result is cached, so every caller shares a single Settings instance.
+    """
     try:
-        settings = Settings()
+        settings = Settings.from_env()
 
         # Ensure logs directory exists here as well
         logs_dir = Path("logs")
@@ -104,6 +176,3 @@ def get_config() -> Settings:
         print("   python -c \"import secrets; print(secrets.token_hex(32))\"")
 
         sys.exit(1)
-
-
-settings = get_config()
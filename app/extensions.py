@@ -2,9 +2,238 @@ from flask import Flask
 from loguru import logger
 import sys
 import os
+import io
+import time
+import queue
+import atexit
+import threading
+from typing import Dict, Optional
 
-def init_extensions(_: Flask) -> None:
-    """Initialize Flask extensions and logging."""
+
+class BatchedFileSink:
+    """Loguru sink that batches log writes on a background thread.
+
+    Records are queued by the logging thread and written through a 64KB
+    buffer, flushed every ``flush_interval`` seconds or when the buffer
+    fills. Files rotate RotatingFileHandler-style (app.log.1, app.log.2, ...).
+
+    Safe across ``fork()`` (e.g. ``gunicorn --preload``): the parent's buffer
+    is flushed before forking and each child starts its own writer thread.
+    Rotation is single-process: only the process that created the sink
+    rotates. Forked children append and reopen the file when it is replaced,
+    so under a preforking server rotate externally (e.g. logrotate with
+    ``create``, not ``copytruncate``).
+
+    I/O errors are reported to stderr and never stop the writer thread, and
+    logging never blocks: records arriving while ``max_queue`` are already
+    pending are dropped and counted.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 5 * 1024 * 1024, backup_count: int = 5,
+                 buffer_size: int = 64 * 1024, flush_interval: float = 0.2, max_queue: int = 10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._owner_pid = os.getpid()
+
+        self._start()
+        atexit.register(self.close)
+        # Hooks look the lock up at call time: each child replaces it, and a
+        # child that forks again must release its own lock, not the original
+        os.register_at_fork(
+            before=self._before_fork,
+            after_in_parent=lambda: self._io_lock.release(),
+            after_in_child=self._after_fork_in_child
+        )
+
+    def write(self, message: str) -> None:
+        try:
+            self._queue.put_nowait(message.encode("utf-8"))
+        except queue.Full:
+            self._dropped += 1
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+    def _start(self) -> None:
+        # Queued records and the writer thread do not carry over into a
+        # forked child, so every process builds its own
+        self._queue: "queue.Queue[bytes | None]" = queue.Queue(maxsize=self.max_queue)
+        self._io_lock = threading.Lock()
+        self._dropped = 0
+        self._file = self._open()
+        self._size = os.path.getsize(self.path)
+        self._rotate_at = self.max_bytes
+
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def _before_fork(self) -> None:
+        # Empty the buffer so the child's copy of it is never written twice
+        self._io_lock.acquire()
+        self._file.flush()
+
+    def _after_fork_in_child(self) -> None:
+        # The inherited buffer was flushed in _before_fork, so the parent's
+        # file object can be closed here without writing anything twice
+        try:
+            self._file.close()
+        except Exception:
+            pass
+        self._start()
+
+    def _open(self) -> io.BufferedWriter:
+        return io.BufferedWriter(io.FileIO(self.path, "a"), buffer_size=self.buffer_size)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                data = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                with self._io_lock:
+                    try:
+                        self._file.flush()
+                    except Exception as e:
+                        self._report(e)
+                continue
+
+            with self._io_lock:
+                try:
+                    self._follow_replaced_file()
+                    if self._dropped:
+                        dropped, self._dropped = self._dropped, 0
+                        self._write(f"[log sink dropped {dropped} records: queue full]\n".encode("utf-8"))
+
+                    # Drain whatever else is waiting before flushing once
+                    while data is not None:
+                        self._write(data)
+                        try:
+                            data = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+
+                    self._file.flush()
+                except Exception as e:
+                    # Lose this batch rather than the writer thread
+                    self._report(e)
+
+                if data is None:
+                    try:
+                        self._file.close()
+                    except Exception as e:
+                        self._report(e)
+                    return
+
+    def _report(self, error: Exception) -> None:
+        # Like loguru's own sink error handling: report on stderr, keep going
+        sys.stderr.write(f"--- Logging error in BatchedFileSink ({self.path}): {error!r} ---\n")
+
+    def _follow_replaced_file(self) -> None:
+        # Another process (or logrotate) may have renamed the file away;
+        # reopen by path so writes keep landing in the live log
+        try:
+            replaced = (self._file.closed
+                        or os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino)
+        except FileNotFoundError:
+            replaced = True
+        if replaced:
+            self._file.close()
+            self._file = self._open()
+        self._size = os.fstat(self._file.fileno()).st_size
+
+    def _write(self, data: bytes) -> None:
+        if (self._size + len(data) > self._rotate_at and self._size > 0
+                and os.getpid() == self._owner_pid):
+            try:
+                self._rotate()
+            except OSError as e:
+                self._report(e)
+        self._file.write(data)
+        self._size += len(data)
+
+    def _rotate(self) -> None:
+        self._file.close()
+        try:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+            self._rotate_at = self.max_bytes
+        except OSError:
+            # e.g. the file is held open elsewhere on Windows; keep appending
+            # to the current file and retry after another max_bytes
+            self._rotate_at = self._size + self.max_bytes
+            raise
+        finally:
+            self._file = self._open()
+            self._size = os.fstat(self._file.fileno()).st_size
+
+
+# One sink per process: its thread, file and atexit/fork hooks cannot be
+# unregistered, so repeated create_app() calls reuse it
+_file_sink: Optional[BatchedFileSink] = None
+
+
+def _get_file_sink(path: str) -> BatchedFileSink:
+    global _file_sink
+    if _file_sink is None:
+        _file_sink = BatchedFileSink(path)
+    return _file_sink
+
+
+# Running sweepers by directory; repeated create_app() calls reuse them
+_sweepers: Dict[str, threading.Thread] = {}
+_sweepers_lock = threading.Lock()
+
+
+def start_upload_sweeper(upload_dir: str, interval: float = 30.0, max_age: float = 300.0) -> threading.Thread:
+    """Delete stale uploaded PDFs from ``upload_dir`` on a daemon thread.
+
+    Runs every ``interval`` seconds and removes ``*.pdf`` files whose mtime is
+    older than ``max_age`` seconds, keeping file cleanup off the request path.
+    ``upload_dir`` must be a directory owned by the upload code alone. At most
+    one sweeper runs per directory per process.
+    """
+
+    def sweep() -> None:
+        while True:
+            time.sleep(interval)
+            cutoff = time.time() - max_age
+            try:
+                with os.scandir(upload_dir) as entries:
+                    for entry in entries:
+                        try:
+                            if (entry.name.endswith(".pdf") and entry.is_file()
+                                    and entry.stat().st_mtime < cutoff):
+                                os.unlink(entry.path)
+                        except FileNotFoundError:
+                            continue
+            except Exception as e:
+                logger.warning(f"Upload sweep failed: {e}")
+
+    with _sweepers_lock:
+        existing = _sweepers.get(upload_dir)
+        if existing is not None and existing.is_alive():
+            return existing
+
+        thread = threading.Thread(target=sweep, name="upload-sweeper", daemon=True)
+        thread.start()
+        _sweepers[upload_dir] = thread
+        return thread
+
+
+def init_extensions(app: Flask, background: bool = True) -> None:
+    """Initialize Flask extensions and logging.
+
+    ``background=False`` keeps console logging only: no log file sink and no
+    upload sweeper.
+    """
 
     # Ensure logs directory exists
     logs_dir = "logs"
@@ -27,14 +256,18 @@ def init_extensions(_: Flask) -> None:
     )
 
     # File logging only if directory is available
-    if logs_dir:
+    if logs_dir and background:
+        file_sink = _get_file_sink(os.path.join(logs_dir, "app.log"))
+        # Pass the bound method so loguru treats it as a plain callable
+        # rather than a stream it should flush after every record
         logger.add(
-            os.path.join(logs_dir, "app.log"),
-            rotation="5 MB",
-            retention="7 days",
-            compression="zip",
-            level="DEBUG",
-            enqueue=True  # safer when multiple requests write logs
+            file_sink.write,
+            format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}",
+            level="DEBUG"
         )
 
+    # Background cleanup of temp uploads
+    if background:
+        start_upload_sweeper(str(app.config['UPLOAD_TMP_DIR']))
+
     logger.info("Extensions initialized")
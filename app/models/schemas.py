@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
 from enum import Enum
 
@@ -37,6 +37,8 @@ class ArgumentCategory(str, Enum):
 
 class ExtractedPoint(BaseModel):
     """Single legal argument extracted by LLM."""
+    model_config = ConfigDict(extra='ignore', defer_build=True)
+
     summary: str = Field(..., min_length=5)
     importance: Optional[str] = None
     importance_score: float = Field(..., ge=0.0, le=1.0)
@@ -1,3 +1,4 @@
+import json
 from typing import List, Dict, Any, Tuple
 from loguru import logger
 
@@ -12,9 +13,64 @@ except Exception:
     ChatGroq = None
 
 
+# Extraction prompt, split around the document context so each request is a
+# plain concatenation instead of re-rendering the whole template
+_PROMPT_PREFIX = """You are a Supreme Court-level legal analyst. Analyze the legal document excerpts and extract key legal arguments.
+                For each argument, provide:
+                1. summary: Clear, concise summary of the legal argument (1-2 sentences)
+                2. importance: Brief explanation of why this argument matters
+                3. importance_score: Float between 0.0-1.0 indicating importance
+                4. stance: Identify the document's position/filer:
+                   - "amicus" = Amicus curiae brief (friend of court supporting a party)
+                   - "plaintiff" = Document filed BY the plaintiff themselves
+                   - "defendant" = Document filed BY the defendant themselves
+                   - "for" = Document argues FOR/supports a specific position or action
+                   - "against" = Document argues AGAINST/opposes a specific position or action
+                   - "neutral" = Objective analysis (court opinion, academic paper, neutral brief)
+
+                   CRITICAL: Look at document title/header first to identify the actual filer!
+                   Example: "Amicus Brief on Behalf of..." = stance is "amicus"
+
+                5. supporting_quote: Exact quote from text that supports this argument
+                6. legal_concepts: List of legal concepts/doctrines mentioned (e.g., ["federalism", "due process", "precedent"])
+                7. page_start: Page number where this argument appears
+                8. category: Type of argument (statutory/constitutional/case_law/procedural/policy/other)
+
+                DOCUMENT EXCERPTS:
+                """
+
+_PROMPT_SUFFIX = """
+
+                Respond with ONLY valid JSON in this exact format:
+                {
+                  "arguments": [
+                    {
+                      "summary": "Clear summary of the legal argument",
+                      "importance": "Why this argument is significant",
+                      "importance_score": 0.85,
+                      "stance": "amicus",
+                      "supporting_quote": "Exact quote from the document text",
+                      "legal_concepts": ["federalism", "state sovereignty"],
+                      "page_start": 7,
+                      "category": "constitutional"
+                    }
+                  ],
+                  "confidence": 0.9
+                }
+
+                Extract 5-10 most important legal arguments. Return ONLY valid JSON, no other text."""
+
+# Checks that a streamed, brace-balanced span is actually JSON
+_JSON_DECODER = json.JSONDecoder()
+
+
 class LLMAnalyzer:
     """Extracts legal arguments from retrieved chunks using LLM."""
 
+    # Label -> enum lookups; unknown labels fall back without raising
+    _STANCE_MAP = {s.value: s for s in Stance}
+    _CATEGORY_MAP = {c.value: c for c in ArgumentCategory}
+
     def __init__(self, api_key: str, model: str = "llama-3.3-70b-versatile", temperature: float = 0.0):
         self.model = model
         self.temperature = temperature
@@ -51,8 +107,7 @@ class LLMAnalyzer:
         prompt = self._create_extraction_prompt(context)
 
         try:
-            response = self.llm.invoke(prompt)
-            response_text = response.content if hasattr(response, 'content') else str(response)
+            response_text = self._generate(prompt)
             parsed_data = parse_json_response(response_text)
 
             if not parsed_data:
@@ -67,18 +122,14 @@ class LLMAnalyzer:
                     retrieval_score = chunks_to_analyze[i][1] if i < len(chunks_to_analyze) else 0.5
                     point_data['retrieval_score'] = retrieval_score
 
-                    stance_str = point_data.get('stance', 'unknown')
-                    try:
-                        stance = Stance(stance_str.lower())
-                    except ValueError:
-                        stance = Stance.UNKNOWN
+                    stance_str = point_data.get('stance') or 'unknown'
+                    stance = self._STANCE_MAP.get(stance_str.lower(), Stance.UNKNOWN)
 
-                    category_str = point_data.get('category', 'other')
-                    try:
-                        category = ArgumentCategory(category_str.lower())
-                    except ValueError:
-                        category = ArgumentCategory.OTHER
+                    category_str = point_data.get('category') or 'other'
+                    category = self._CATEGORY_MAP.get(category_str.lower(), ArgumentCategory.OTHER)
 
+                    # LLM output is untrusted: keep full validation here so
+                    # malformed points are dropped rather than passed on
                     point = ExtractedPoint(
                         summary=point_data.get('summary', point_data.get('argument', '')),
                         importance=point_data.get('importance'),
@@ -106,6 +157,57 @@ class LLMAnalyzer:
             logger.error(f"LLM analysis failed: {e}")
             return LLMAnalysisOutput(extracted_points=[], confidence=0.0)
 
+    def _generate(self, prompt: str) -> str:
+        """Stream the LLM response, stopping once the top-level JSON object closes."""
+        try:
+            stream = self.llm.stream(prompt)
+        except AttributeError:
+            response = self.llm.invoke(prompt)
+            return response.content if hasattr(response, 'content') else str(response)
+
+        parts = []
+        offset = 0
+        start = 0
+        depth = 0
+        in_string = False
+        escaped = False
+
+        for chunk in stream:
+            text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+            parts.append(text)
+
+            # Track brace depth (ignoring braces inside strings) so trailing
+            # prose after the JSON is never generated or waited on
+            for pos, ch in enumerate(text, offset):
+                if in_string:
+                    if escaped:
+                        escaped = False
+                    elif ch == '\\':
+                        escaped = True
+                    elif ch == '"':
+                        in_string = False
+                elif ch == '{':
+                    if depth == 0:
+                        start = pos
+                    depth += 1
+                elif depth and ch == '"':
+                    in_string = True
+                elif depth and ch == '}':
+                    depth -= 1
+                    if depth == 0:
+                        # Only stop once the span is real JSON; braces in
+                        # leading prose (e.g. "Sure {ok} here:") are skipped
+                        response = "".join(parts)
+                        try:
+                            _JSON_DECODER.raw_decode(response, start)
+                            return response
+                        except ValueError:
+                            pass
+
+            offset += len(text)
+
+        return "".join(parts)
+
     @staticmethod
     def _prepare_context(chunks_with_scores: List[Tuple[Dict[str, Any], float]]) -> str:
         context_parts = []
@@ -117,45 +219,4 @@ class LLMAnalyzer:
 
     @staticmethod
     def _create_extraction_prompt(context: str) -> str:
-        return f"""You are a Supreme Court-level legal analyst. Analyze the legal document excerpts and extract key legal arguments.
-                For each argument, provide:
-                1. summary: Clear, concise summary of the legal argument (1-2 sentences)
-                2. importance: Brief explanation of why this argument matters
-                3. importance_score: Float between 0.0-1.0 indicating importance
-                4. stance: Identify the document's position/filer:
-                   - "amicus" = Amicus curiae brief (friend of court supporting a party)
-                   - "plaintiff" = Document filed BY the plaintiff themselves
-                   - "defendant" = Document filed BY the defendant themselves
-                   - "for" = Document argues FOR/supports a specific position or action
-                   - "against" = Document argues AGAINST/opposes a specific position or action
-                   - "neutral" = Objective analysis (court opinion, academic paper, neutral brief)
-
-                   CRITICAL: Look at document title/header first to identify the actual filer!
-                   Example: "Amicus Brief on Behalf of..." = stance is "amicus"
-
-                5. supporting_quote: Exact quote from text that supports this argument
-                6. legal_concepts: List of legal concepts/doctrines mentioned (e.g., ["federalism", "due process", "precedent"])
-                7. page_start: Page number where this argument appears
-                8. category: Type of argument (statutory/constitutional/case_law/procedural/policy/other)
-
-                DOCUMENT EXCERPTS:
-                {context}
-
-                Respond with ONLY valid JSON in this exact format:
-                {{
-                  "arguments": [
-                    {{
-                      "summary": "Clear summary of the legal argument",
-                      "importance": "Why this argument is significant",
-                      "importance_score": 0.85,
-                      "stance": "amicus",
-                      "supporting_quote": "Exact quote from the document text",
-                      "legal_concepts": ["federalism", "state sovereignty"],
-                      "page_start": 7,
-                      "category": "constitutional"
-                    }}
-                  ],
-                  "confidence": 0.9
-                }}
-
-                Extract 5-10 most important legal arguments. Return ONLY valid JSON, no other text."""
+        return _PROMPT_PREFIX + context + _PROMPT_SUFFIX
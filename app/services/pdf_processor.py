@@ -1,8 +1,13 @@
 from typing import List, Dict, Any
-import pdfplumber
+import threading
+import pypdfium2 as pdfium
 from loguru import logger
 
 
+# PDFium is not thread-safe, even across separate documents
+_PDFIUM_LOCK = threading.Lock()
+
+
 class PDFProcessor:
     def __init__(self, chunk_size: int = 1500, chunk_overlap: int = 200):
         self.chunk_size = chunk_size
@@ -13,22 +18,34 @@ class PDFProcessor:
         total_pages = 0
 
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                total_pages = len(pdf.pages)
-                logger.info(f"Processing PDF: {total_pages} pages")
+            # Hold the PDFium lock only while extracting text; chunking below
+            # is pure Python and can run concurrently with other documents
+            with _PDFIUM_LOCK:
+                pdf = pdfium.PdfDocument(pdf_path)
+                try:
+                    total_pages = len(pdf)
+                    logger.info(f"Processing PDF: {total_pages} pages")
 
-                for page_num, page in enumerate(pdf.pages, start=1):
-                    text = page.extract_text()
+                    page_texts = []
+                    for page in pdf:
+                        # Plain text extraction only; no layout analysis needed
+                        textpage = page.get_textpage()
+                        page_texts.append(textpage.get_text_range())
+                        textpage.close()
+                        page.close()
+                finally:
+                    pdf.close()
 
-                    if text and text.strip():
-                        # Split page text into chunks while preserving page number
-                        page_chunks = self._split_text_with_page(
-                            text=text,
-                            page_number=page_num,
-                            doc_id=doc_id,
-                            total_pages=total_pages
-                        )
-                        chunks.extend(page_chunks)
+            for page_num, text in enumerate(page_texts, start=1):
+                if text and text.strip():
+                    # Split page text into chunks while preserving page number
+                    page_chunks = self._split_text_with_page(
+                        text=text,
+                        page_number=page_num,
+                        doc_id=doc_id,
+                        total_pages=total_pages
+                    )
+                    chunks.extend(page_chunks)
 
             logger.info(f"Processed {total_pages} pages into {len(chunks)} chunks")
             return chunks, total_pages
@@ -38,31 +55,25 @@ class PDFProcessor:
             raise RuntimeError(f"Failed to process PDF: {e}") from e
 
     def _split_text_with_page(self, text: str, page_number: int, doc_id: str, total_pages: int) -> List[Dict[str, Any]]:
-        chunks = []
+        # Fixed-size windows with overlap. A window starts every `step` chars
+        # until the previous window already reached the end of the text.
+        size = self.chunk_size
+        step = size - self.chunk_overlap
+        starts = range(0, max(len(text) - self.chunk_overlap, 1), step)
 
-        # Simple splitting by character count with overlap
-        start = 0
-        chunk_index = 0
+        pieces = [piece for s in starts if (piece := text[s:s + size].strip())]
+        chunk_prefix = f"{doc_id}_page{page_number}_chunk"
 
-        while start < len(text):
-            end = start + self.chunk_size
-            chunk_text = text[start:end]
-
-            if chunk_text.strip():
-                chunk = {
-                    'text': chunk_text.strip(),
-                    'metadata': {
-                        'chunk_id': f"{doc_id}_page{page_number}_chunk{chunk_index}",
-                        'page_number': page_number,
-                        'document_id': doc_id,
-                        'total_pages': total_pages,
-                        'chunk_index': chunk_index
-                    }
+        return [
+            {
+                'text': piece,
+                'metadata': {
+                    'chunk_id': f"{chunk_prefix}{chunk_index}",
+                    'page_number': page_number,
+                    'document_id': doc_id,
+                    'total_pages': total_pages,
+                    'chunk_index': chunk_index
                 }
-                chunks.append(chunk)
-                chunk_index += 1
-
-            # Move start with overlap
-            start = end - self.chunk_overlap if end < len(text) else end
-
-        return chunks
+            }
+            for chunk_index, piece in enumerate(pieces)
+        ]
@@ -1,5 +1,7 @@
 import time
 import os
+import threading
+from typing import Optional
 from loguru import logger
 
 from app.services.pdf_processor import PDFProcessor
@@ -8,7 +10,13 @@ from app.services.vector_store import VectorStore
 from app.services.llm_analyzer import LLMAnalyzer
 from app.services.post_processor import PostProcessor
 from app.utils.embeddings import EmbeddingService
-from app.utils.helpers import calculate_content_hash
+from app.utils.helpers import calculate_file_hash
+from app.models.schemas import FinalKeyPoint
+
+# Response fields for each key point, read straight off the model
+_KEY_POINT_FIELDS = tuple(FinalKeyPoint.model_fields)
+
+_RETRIEVAL_QUERY = "Extract key legal arguments from this document"
 
 
 class AnalysisPipeline:
@@ -20,7 +28,10 @@ class AnalysisPipeline:
 
         self.embedding_service = EmbeddingService(
             model_name=settings.EMBEDDING_MODEL,
-            device=settings.EMBEDDING_DEVICE
+            device=settings.EMBEDDING_DEVICE,
+            cpu_bf16=settings.EMBEDDING_CPU_BF16,
+            cache_size=settings.EMBEDDING_CACHE_SIZE,
+            process_pool=settings.EMBEDDING_PROCESS_POOL
         )
 
         self.pdf_processor = PDFProcessor(
@@ -33,7 +44,8 @@ class AnalysisPipeline:
         self.vector_store = VectorStore(
             embedding_service=self.embedding_service,
             m=settings.FAISS_M,
-            ef_construction=settings.FAISS_EF_CONSTRUCTION
+            ef_construction=settings.FAISS_EF_CONSTRUCTION,
+            sq_type=settings.FAISS_SQ_TYPE
         )
 
         self.llm_analyzer = LLMAnalyzer(
@@ -46,10 +58,20 @@ class AnalysisPipeline:
             top_k=settings.FINAL_OUTPUT_COUNT
         )
 
+        # Guards the shared vector store when the pipeline is reused across requests
+        self._index_lock = threading.Lock()
+
+        # The retrieval query never changes, so embed it once up front
+        self._query_embedding = self.embedding_service.encode_query(_RETRIEVAL_QUERY)
+
         logger.info("Pipeline initialized")
 
-    def analyze_document(self, pdf_path: str, filename: str) -> dict:
-        """Run complete analysis pipeline."""
+    def analyze_document(self, pdf_path: str, filename: str, doc_id: Optional[str] = None) -> dict:
+        """Run complete analysis pipeline.
+
+        ``doc_id`` is the content hash computed while the upload was streamed
+        to disk; when omitted the file is re-read and hashed here.
+        """
 
         start_time = time.time()
 
@@ -61,13 +83,12 @@ class AnalysisPipeline:
                 logger.error(f"PDF not found: {pdf_path}")
                 raise FileNotFoundError("Uploaded PDF not found on server.")
 
-            with open(pdf_path, "rb") as f:
-                content = f.read()
-
-            if not content:
+            if os.path.getsize(pdf_path) == 0:
                 raise ValueError("Empty PDF file.")
 
-            doc_id = calculate_content_hash(content)
+            if doc_id is None:
+                doc_id = calculate_file_hash(pdf_path)
+
             logger.info(f"Document ID: {doc_id[:12]}...")
 
             # Step 2: Process PDF
@@ -81,22 +102,25 @@ class AnalysisPipeline:
             logger.info("Step 3: Extracting metadata...")
             metadata = self.metadata_extractor.extract_metadata(chunks, filename)
 
-            # Step 4: Initialize vector store
-            logger.info("Step 4: Initializing vector store...")
-            self.vector_store.initialize_index(doc_id, force_new=True)
-
-            # Step 5: Add chunks
-            logger.info("Step 5: Embedding & indexing...")
-            self.vector_store.add_chunks(chunks)
-
-            # Step 6: Retrieve relevant chunks
-            logger.info("Step 6: Retrieving relevant chunks...")
-            query = "Extract key legal arguments from this document"
-            retrieved_chunks = self.vector_store.search(
-                query=query,
-                top_k=self.settings.TOP_K_RETRIEVAL,
-                ef_search=self.settings.FAISS_EF_SEARCH
-            )
+            # The vector store holds a single per-document index, so steps 4-6
+            # must not interleave across concurrent requests
+            with self._index_lock:
+                # Step 4: Initialize vector store
+                logger.info("Step 4: Initializing vector store...")
+                self.vector_store.initialize_index(doc_id, force_new=True)
+
+                # Step 5: Add chunks
+                logger.info("Step 5: Embedding & indexing...")
+                self.vector_store.add_chunks(chunks)
+
+                # Step 6: Retrieve relevant chunks
+                logger.info("Step 6: Retrieving relevant chunks...")
+                retrieved_chunks = self.vector_store.search(
+                    query=_RETRIEVAL_QUERY,
+                    top_k=self.settings.TOP_K_RETRIEVAL,
+                    ef_search=self.settings.FAISS_EF_SEARCH or None,
+                    query_embedding=self._query_embedding
+                )
 
             # Step 7: LLM analysis
             logger.info("Step 7: Analyzing with LLM...")
@@ -119,7 +143,10 @@ class AnalysisPipeline:
                 "document_name": filename,
                 "total_pages": total_pages,
                 "total_chunks": len(chunks),
-                "key_points": [p.model_dump() for p in final_points],
+                "key_points": [
+                    {name: getattr(p, name) for name in _KEY_POINT_FIELDS}
+                    for p in final_points
+                ],
                 "processing_time": round(processing_time, 2),
                 "metadata": metadata
             }
@@ -1,9 +1,15 @@
+import heapq
+from collections import defaultdict
 from typing import List, Optional, Tuple
-from rapidfuzz import fuzz
+import numpy as np
+from rapidfuzz import fuzz, process
 from loguru import logger
 
 from app.models.schemas import ExtractedPoint, FinalKeyPoint
 
+# Quotes shorter than this are too generic to locate by fuzzy matching
+_MIN_QUOTE_LENGTH = 20
+
 class PostProcessor:
     # Post-process and rank extracted arguments.
 
@@ -13,94 +19,127 @@ class PostProcessor:
     def process_and_rank(self, extracted_points: List[ExtractedPoint], chunks: List[dict]) -> List[FinalKeyPoint]:
         # Process extracted points and create final ranked list.
 
-        final_points = []
+        n = len(extracted_points)
+        importance = np.empty(n, dtype=np.float64)
+        retrieval = np.empty(n, dtype=np.float64)
+        match = np.empty(n, dtype=np.float64)
 
-        for point in extracted_points:
-            retrieval_score = point.retrieval_score or 0.5
-            importance_score = point.importance_score or 0.5
+        # Enhanced quote matching (now used!), scored for all points at once
+        quotes = [point.supporting_quote or point.summary for point in extracted_points]
+        matches = self._match_quotes(
+            quotes,
+            chunks,
+            [point.page_start for point in extracted_points]
+        )
 
-            # Enhanced quote matching (now used!)
-            quote = point.supporting_quote or point.summary
-            best_chunk, match_confidence = self._find_best_matching_chunk(
-                quote,
-                chunks,
-                point.page_start
-            )
+        for i, point in enumerate(extracted_points):
+            retrieval[i] = point.retrieval_score or 0.5
+            importance[i] = point.importance_score or 0.5
+            best_chunk, match[i] = matches[i]
 
             # If we found a better page location, update metadata
             if best_chunk:
                 point.page_start = best_chunk.get("metadata", {}).get("page_number", point.page_start)
 
-            # NEW: incorporate match confidence into scoring
-            # match_confidence = 0.0–1.0
-            # helps penalize hallucinated arguments
-            combined_score = (
-                0.5 * importance_score +
-                0.3 * retrieval_score +
-                0.2 * match_confidence
-            )
+        # NEW: incorporate match confidence into scoring
+        # match_confidence = 0.0–1.0
+        # helps penalize hallucinated arguments
+        combined = 0.5 * importance + 0.3 * retrieval + 0.2 * match
 
-            final_point = FinalKeyPoint(
+        # Top k by score in O(N log k); nlargest is stable, so ties keep
+        # extraction order. Only the survivors are built.
+        scores = combined.tolist()
+        order = heapq.nlargest(self.top_k, range(n), key=scores.__getitem__)
+
+        # Every field comes from an already-checked ExtractedPoint or from
+        # scores computed above (all within [0, 1]), so skip re-validation
+        final_points = []
+        for rank, i in enumerate(order, 1):
+            point = extracted_points[i]
+            final_points.append(FinalKeyPoint.model_construct(
                 summary=point.summary,
                 importance=point.importance,
-                importance_score=importance_score,
+                importance_score=float(importance[i]),
                 stance=point.stance,
-                supporting_quote=quote,
+                supporting_quote=quotes[i],
                 legal_concepts=point.legal_concepts,
                 page_start=point.page_start,
                 page_end=point.page_end,
                 line_start=point.line_start,
                 line_end=point.line_end,
                 category=point.category,
-                retrieval_score=retrieval_score,
-                combined_score=combined_score,
-                final_rank=1
-            )
-
-            final_points.append(final_point)
-
-        # Sort by combined score (descending)
-        final_points.sort(key=lambda x: x.combined_score, reverse=True)
-
-        # Limit to top_k
-        final_points = final_points[:self.top_k]
-
-        # Assign final ranks
-        for i, point in enumerate(final_points, 1):
-            point.final_rank = i
+                retrieval_score=float(retrieval[i]),
+                combined_score=float(combined[i]),
+                final_rank=rank
+            ))
 
         logger.info(f"Processed and ranked {len(final_points)} final key points")
         return final_points
 
     @staticmethod
-    def _find_best_matching_chunk(quote: str, chunks: List[dict], expected_page: Optional[int]) -> Tuple[Optional[dict], float]:
-        # Find chunk that best matches the quote.
-
-        if not quote or not chunks:
-            return None, 0.0
-
-        best_match = None
-        best_score = 0.0
-
-        # Filter chunks by page if available
-        candidate_chunks = chunks
-        if expected_page:
-            candidate_chunks = [
-                c for c in chunks
-                if c.get('metadata', {}).get('page_number') == expected_page
-            ]
-            if not candidate_chunks:
-                candidate_chunks = chunks
-
-        # Find best matching chunk using fuzzy matching
-        for chunk in candidate_chunks:
-            chunk_text = chunk.get('text', '')
-            score = fuzz.token_set_ratio(quote.lower(), chunk_text.lower()) / 100.0
-
-            if score > best_score:
-                best_score = score
-                best_match = chunk
-
-        logger.debug(f"Quote match confidence: {best_score:.2f}")
-
-        return best_match, best_score
+    def _match_quotes(quotes: List[str], chunks: List[dict],
+                      expected_pages: List[Optional[int]]) -> List[Tuple[Optional[dict], float]]:
+        # Find the chunk that best matches each quote.
+        # Verbatim quotes are found by substring search; the rest are scored
+        # with one rapidfuzz call (C++, multi-threaded) per expected page,
+        # against that page's chunks only.
+
+        if not quotes or not chunks:
+            return [(None, 0.0)] * len(quotes)
+
+        # VectorStore.add_chunks caches the lowercased text on each chunk
+        chunk_texts = [
+            c['_text_lower'] if '_text_lower' in c else c.get('text', '').lower()
+            for c in chunks
+        ]
+
+        # page -> column indices, built once instead of re-filtering every chunk per quote
+        by_page = defaultdict(list)
+        for j, c in enumerate(chunks):
+            by_page[c.get('metadata', {}).get('page_number')].append(j)
+        all_cols = range(len(chunks))
+
+        lowered = [(q or '').lower() for q in quotes]
+        results: List[Tuple[Optional[dict], float]] = [(None, 0.0)] * len(quotes)
+
+        # Quotes left for fuzzy scoring, grouped by expected page (None = no
+        # usable page), so each group is scored only against its own chunks
+        fuzzy = defaultdict(list)
+
+        for i, (quote, expected_page) in enumerate(zip(lowered, expected_pages)):
+            # Too short to place reliably; fall back to a neutral prior
+            if len(quote) < _MIN_QUOTE_LENGTH:
+                results[i] = (None, 0.5)
+                continue
+
+            # Restrict to chunks on the expected page, if any exist
+            page = expected_page if expected_page and expected_page in by_page else None
+            cols = all_cols if page is None else by_page[page]
+
+            # LLM quotes are often verbatim: a substring hit skips fuzzy scoring
+            hit = next((j for j in cols if quote in chunk_texts[j]), None)
+            if hit is not None:
+                results[i] = (chunks[hit], 1.0)
+            else:
+                fuzzy[page].append(i)
+
+        for page, rows in fuzzy.items():
+            cols = all_cols if page is None else by_page[page]
+            scores = process.cdist(
+                [lowered[i] for i in rows],
+                [chunk_texts[j] for j in cols],
+                scorer=fuzz.token_set_ratio,
+                dtype=np.float64,
+                workers=-1
+            ) / 100.0
+
+            for i, row in zip(rows, scores):
+                # argmax keeps the first chunk on ties, like the old strict '>' scan
+                k = int(row.argmax())
+                best_score = float(row[k])
+                logger.debug(f"Quote match confidence: {best_score:.2f}")
+
+                if best_score > 0.0:
+                    results[i] = (chunks[cols[k]], best_score)
+
+        return results
@@ -1,18 +1,26 @@
 from typing import List, Tuple, Optional, Dict, Any
 import faiss
-import math
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from loguru import logger
 
 from app.utils.embeddings import EmbeddingService
 
 class VectorStore:
-    def __init__(self, embedding_service: EmbeddingService, m: int = 32, ef_construction: int = 64):
+    def __init__(self, embedding_service: EmbeddingService, m: int = 32, ef_construction: int = 40,
+                 sq_type: str = "QT_8bit"):
         self.embedding_service = embedding_service
         self.dimension = embedding_service.dimension
         self.m = m
         self.ef_construction = ef_construction
 
-        self.index: Optional[faiss.IndexHNSWFlat] = None
+        # Scalar quantizer for stored vectors, e.g. QT_8bit, QT_fp16 or QT_bf16
+        # (bf16 needs a FAISS build that has it; fastest on AVX-512-BF16 CPUs)
+        self.sq_type = getattr(faiss.ScalarQuantizer, sq_type, None)
+        if self.sq_type is None:
+            raise ValueError(f"Unsupported FAISS scalar quantizer type: {sq_type}")
+
+        self.index: Optional[faiss.IndexHNSW] = None
         self.chunks: List[Dict[str, Any]] = []
         self.doc_id: Optional[str] = None
 
@@ -22,7 +30,12 @@ class VectorStore:
             return
 
         try:
-            self.index = faiss.IndexHNSWFlat(self.dimension, self.m)
+            # HNSW over scalar-quantized vectors (8-bit by default: 4x smaller
+            # than fp32 storage with int8 distance kernels, at a small recall
+            # cost). Vectors are L2-normalized, so inner product is cosine.
+            self.index = faiss.IndexHNSWSQ(
+                self.dimension, self.sq_type, self.m, faiss.METRIC_INNER_PRODUCT
+            )
             self.index.hnsw.efConstruction = self.ef_construction
             self.doc_id = doc_id
             self.chunks = []
@@ -32,15 +45,38 @@ class VectorStore:
             logger.error(f"Failed to initialize FAISS index: {e}")
             raise RuntimeError(f"FAISS initialization failed: {e}") from e
 
-    def add_chunks(self, chunks: List[Dict[str, Any]]):
+    def add_chunks(self, chunks: List[Dict[str, Any]], batch_size: int = 512):
         if not self.index:
             raise RuntimeError("Index not initialized. Call initialize_index() first.")
 
         texts = [chunk['text'] for chunk in chunks]
 
         try:
-            embeddings = self.embedding_service.encode(texts)
-            self.index.add(embeddings)
+            # Encode batch i+1 while FAISS inserts batch i on a worker thread;
+            # both release the GIL, so wall time approaches max(encode, add)
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="faiss-add") as pool:
+                pending = None
+                for start in range(0, len(texts), batch_size):
+                    # FAISS wants a C-contiguous float32 (N, D) matrix and copies otherwise
+                    embeddings = self.embedding_service.encode(texts[start:start + batch_size])
+                    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+                    faiss.normalize_L2(embeddings)
+
+                    # The quantizer learns per-dimension ranges from the first batch
+                    if not self.index.is_trained:
+                        self.index.train(embeddings)
+
+                    # HNSW inserts must not overlap each other; keep one in flight
+                    if pending is not None:
+                        pending.result()
+                    pending = pool.submit(self.index.add, embeddings)
+
+                if pending is not None:
+                    pending.result()
+
+            # Lowercased once here so quote matching never re-lowers chunk text
+            for chunk in chunks:
+                chunk['_text_lower'] = chunk['text'].lower()
             self.chunks.extend(chunks)
 
             logger.info(f"Added {len(chunks)} chunks to vector store")
@@ -49,40 +85,42 @@ class VectorStore:
             logger.error(f"Failed to add chunks: {e}")
             raise
 
-    def search(self, query: str, top_k: int = 60, ef_search: int = 64) -> List[Tuple[Dict[str, Any], float]]:
+    def search(self, query: str, top_k: int = 60, ef_search: Optional[int] = None,
+               query_embedding: Optional[np.ndarray] = None) -> List[Tuple[Dict[str, Any], float]]:
         if not self.index or not self.chunks:
             logger.warning("No chunks in index")
             return []
 
         try:
-            self.index.hnsw.efSearch = ef_search
-            query_embedding = self.embedding_service.encode([query])
+            # Recall@k needs efSearch >= k, so by default scale it with top_k
+            self.index.hnsw.efSearch = ef_search or max(top_k * 2, 32)
+            if query_embedding is None:
+                query_embedding = self.embedding_service.encode_query(query)
+            # Copy: normalize_L2 works in place and callers may reuse their vector
+            query_embedding = np.array(query_embedding[np.newaxis, :], dtype=np.float32)
+            faiss.normalize_L2(query_embedding)
 
             distances, indices = self.index.search(
                 query_embedding,
                 min(top_k, len(self.chunks))
             )
 
-            results = []
-
-            for dist, idx in zip(distances[0], indices[0]):
-                if 0 <= idx < len(self.chunks):
-                    chunk = self.chunks[int(idx)].copy()
-
-                    # Sanitize FAISS distance
-                    if math.isnan(dist) or math.isinf(dist):
-                        dist = 1e6 
-
-                    # Clamp negative distances
-                    dist = max(dist, 0.0)
-
-                    # Convert to 0–1 similarity score
-                    retrieval_score = 1.0 / (1.0 + dist)
-
-                    # Enforce valid range
-                    retrieval_score = max(0.0, min(retrieval_score, 1.0))
-
-                    results.append((chunk, retrieval_score))
+            # Map cosine similarity [-1, 1] to a 0–1 score; quantization can
+            # push values slightly out of range, so sanitize and clamp
+            scores = np.nan_to_num((distances[0] + 1.0) * 0.5, nan=0.0, posinf=1.0, neginf=0.0)
+            scores = np.clip(scores, 0.0, 1.0)
+
+            # FAISS pads missing hits with -1; drop them with one mask
+            ids = indices[0]
+            valid = (ids >= 0) & (ids < len(self.chunks))
+
+            # Chunks are returned by reference, not copied: callers treat
+            # them as read-only and they live as long as this index
+            chunks = self.chunks
+            results = [
+                (chunks[idx], score)
+                for idx, score in zip(ids[valid].tolist(), scores[valid].tolist())
+            ]
 
             logger.info(f"Retrieved {len(results)} chunks for query")
             return results
@@ -1,10 +1,12 @@
-from .helpers import parse_json_response, calculate_content_hash, clean_text
+from .helpers import parse_json_response, calculate_content_hash, calculate_file_hash, save_stream_with_hash, clean_text
 from .embeddings import EmbeddingService
 from .validators import validate_pdf, validate_file_size
 
 __all__ = [
     'parse_json_response',
     'calculate_content_hash',
+    'calculate_file_hash',
+    'save_stream_with_hash',
     'clean_text',
     'EmbeddingService',
     'validate_pdf',
@@ -1,38 +1,164 @@
-from typing import List
+from typing import List, Optional
+from collections import OrderedDict
+from contextlib import contextmanager
+import hashlib
+import threading
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
 from loguru import logger
 
 
 class EmbeddingService:
-    def __init__(self, model_name: str, device: str = "cpu"):
+    # With process_pool on, CPU batches at least this large go to the pool
+    _POOL_MIN_TEXTS = 512
+
+    def __init__(self, model_name: str, device: str = "cpu", cpu_bf16: bool = False, cache_size: int = 10000,
+                 process_pool: bool = False):
         self.model_name = model_name
         self.device = device
+        # bf16 autocast only pays off on CPUs with native bf16 (AVX512-BF16/AMX)
+        self.cpu_bf16 = cpu_bf16 and not device.startswith("cuda")
+
+        # LRU cache of text digest -> embedding row; 0 disables it
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # Larger batches keep the GPU busy; CPU throughput flattens out earlier
+        self.default_batch_size = 128 if device.startswith("cuda") else 64
+
+        # Optional multi-process encode pool for large CPU batches, started on
+        # first use. Its workers are spawned, each loads its own model copy and
+        # re-imports __main__, so the entry script must guard app creation
+        # (see run.py). Off by default.
+        self.process_pool = process_pool and not device.startswith("cuda")
+        self._pool = None
+        self._pool_lock = threading.Lock()
 
         try:
             logger.info(f"Loading embedding model: {model_name}")
             self.model = SentenceTransformer(model_name, device=device)
+            self.model.eval()
+            if device.startswith("cuda"):
+                # Half precision roughly halves GEMM time and memory traffic on GPU
+                self.model.half()
             self.dimension = self.model.get_sentence_embedding_dimension()
             logger.info(f"Embedding model loaded. Dimension: {self.dimension}")
         except Exception as e:
             logger.error(f"Failed to load embedding model: {e}")
             raise RuntimeError(f"Cannot initialize embeddings: {e}") from e
 
-    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        # Run one throwaway encode so lazy init (kernels, tokenizer caches)
+        # happens at startup instead of on the first request
+        try:
+            self._embed(["warmup"], batch_size=1)
+        except Exception as e:
+            logger.warning(f"Embedding warm-up failed: {e}")
+
+    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
         if not texts:
             raise ValueError("No texts provided for encoding")
 
+        if batch_size is None:
+            batch_size = self.default_batch_size
+
         try:
-            embeddings = self.model.encode(
-                texts,
-                batch_size=batch_size,
-                show_progress_bar=len(texts) > 100,
-                convert_to_numpy=True,
-                normalize_embeddings=True
-            )
-            logger.debug(f"Generated {len(embeddings)} embeddings")
+            keys = [self._cache_key(text) for text in texts]
+            embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+
+            # Fill rows already in the cache; collect the rest, deduplicated
+            missing = {}
+            with self._cache_lock:
+                for i, key in enumerate(keys):
+                    row = self._cache.get(key)
+                    if row is None:
+                        missing.setdefault(key, []).append(i)
+                    else:
+                        self._cache.move_to_end(key)
+                        embeddings[i] = row
+
+            if missing:
+                fresh = self._embed([texts[rows[0]] for rows in missing.values()], batch_size)
+                for rows, row in zip(missing.values(), fresh):
+                    embeddings[rows] = row
+                self._cache_put(missing.keys(), fresh)
+
+            logger.debug(f"Generated {len(missing)} embeddings for {len(texts)} texts")
             return embeddings
 
         except Exception as e:
             logger.error(f"Embedding generation failed: {e}")
             raise RuntimeError(f"Failed to generate embeddings: {e}") from e
+
+    def encode_query(self, text: str) -> np.ndarray:
+        """Embed a single query string, returning a 1-D vector."""
+        return self.encode([text])[0]
+
+    def close(self) -> None:
+        """Stop the multi-process encode pool, if one was started."""
+        pool, self._pool = getattr(self, "_pool", None), None
+        if pool is not None:
+            self.model.stop_multi_process_pool(pool)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _embed(self, texts: List[str], batch_size: int) -> np.ndarray:
+        # Raw (unnormalized) vectors: VectorStore L2-normalizes them with
+        # faiss.normalize_L2, so skip the extra torch normalize pass here
+        if self.process_pool and len(texts) >= self._POOL_MIN_TEXTS:
+            # The pool's shared task/result queues are not safe for concurrent
+            # callers, so one encode at a time; returns float32 numpy directly
+            with self._pool_lock:
+                if self._pool is None:
+                    logger.info("Starting multi-process embedding pool")
+                    self._pool = self.model.start_multi_process_pool()
+                return self.model.encode_multi_process(
+                    texts,
+                    self._pool,
+                    batch_size=batch_size,
+                    normalize_embeddings=False
+                )
+
+        with self._inference():
+            return self._to_numpy(self.model.encode(
+                texts,
+                batch_size=batch_size,
+                show_progress_bar=len(texts) > 100,
+                convert_to_tensor=True,
+                normalize_embeddings=False
+            ))
+
+    def _cache_put(self, keys, rows: np.ndarray) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            for key, row in zip(keys, rows):
+                # Copy so callers mutating their result (e.g. in-place
+                # normalization) can never corrupt the cached row
+                self._cache[key] = row.copy()
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _cache_key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    @contextmanager
+    def _inference(self):
+        with torch.inference_mode():
+            if self.cpu_bf16:
+                with torch.autocast("cpu", dtype=torch.bfloat16):
+                    yield
+            else:
+                yield
+
+    @staticmethod
+    def _to_numpy(embeddings: torch.Tensor) -> np.ndarray:
+        # fp16/bf16 model outputs are upcast so callers always get float32
+        return embeddings.float().cpu().numpy()
@@ -1,12 +1,40 @@
 import json
-import hashlib
+import orjson
+import blake3
 import re
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, BinaryIO
 from loguru import logger
 
 
+# Compiled once at import; these run on every LLM response / cleaned string.
+# The fence pattern strips only a fence wrapping the whole response, so
+# backticks inside JSON string values are left alone
+_CODE_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$')
+_WHITESPACE_RE = re.compile(r'\s+')
+_JSON_DECODER = json.JSONDecoder()
+
+
 def calculate_content_hash(content: bytes) -> str:
-    return hashlib.sha256(content).hexdigest()
+    return blake3.blake3(content).hexdigest()
+
+
+def calculate_file_hash(filepath: str, chunk_size: int = 1 << 20) -> str:
+    """Hash a file on disk in chunks, without holding it in memory."""
+    hasher = blake3.blake3()
+    with open(filepath, "rb") as f:
+        while chunk := f.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def save_stream_with_hash(stream: BinaryIO, filepath: str, chunk_size: int = 1 << 20) -> str:
+    """Write an upload stream to disk in chunks, hashing it on the way through."""
+    hasher = blake3.blake3()
+    with open(filepath, "wb") as out:
+        while chunk := stream.read(chunk_size):
+            out.write(chunk)
+            hasher.update(chunk)
+    return hasher.hexdigest()
 
 
 def parse_json_response(response_text: str) -> Optional[Dict[str, Any]]:
@@ -16,102 +44,44 @@ def parse_json_response(response_text: str) -> Optional[Dict[str, Any]]:
 
     response_text = response_text.strip()
 
-    # Try each parsing strategy in order
-    for parser in (
-        _try_direct_parse,
-        _try_code_block,
-        _try_bracket_extract,
-        _try_remove_prefix,
-    ):
-        result = parser(response_text)
-        if result is not None:
-            return result
-
-    logger.error(f"Failed to parse JSON from response. First 200 chars: {response_text[:200]}")
-    return None
-
+    # Fast path: the whole response is valid JSON
+    try:
+        return orjson.loads(response_text)
+    except orjson.JSONDecodeError:
+        pass
 
-def _try_direct_parse(text: str) -> Optional[Dict[str, Any]]:
-    """Try plain JSON parsing."""
+    # Markdown code fences around an otherwise valid JSON value
+    unfenced = _CODE_FENCE_RE.sub('', response_text).strip()
     try:
-        return json.loads(text)
-    except Exception:
-        return None
+        return orjson.loads(unfenced)
+    except orjson.JSONDecodeError:
+        pass
 
+    result = _scan_for_json(unfenced)
+    if result is not None:
+        return result
 
-def _try_code_block(text: str) -> Optional[Dict[str, Any]]:
-    """
-    Extract JSON inside Markdown code fences:
+    logger.error(f"Failed to parse JSON from response. First 200 chars: {response_text[:200]}")
+    return None
 
-    ```json
-    { ... }
-    ```
 
-    or
+def _scan_for_json(text: str) -> Optional[Any]:
+    """
+    Return the first JSON object (or, failing that, array) embedded in text.
 
-    ```
-    { ... }
-    ```
+    Handles responses wrapped in prose, prefixes like "Here is the JSON:",
+    or trailing commentary. Each candidate opening bracket is handed to the
+    C JSON scanner, which stops at the end of the value, so the text is
+    not re-sliced or re-parsed per strategy.
     """
-    patterns = [
-        r"```json\s*(\{.*?\})\s*```",
-        r"```\s*(\{.*?\})\s*```",
-        r"```json\s*(\[.*?\])\s*```",
-        r"```\s*(\[.*?\])\s*```",
-    ]
-
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.DOTALL)
-        for match in matches:
+    for opener in ('{', '['):
+        idx = text.find(opener)
+        while idx != -1:
             try:
-                return json.loads(match)
-            except Exception:
-                continue
-
-    return None
+                return _JSON_DECODER.raw_decode(text, idx)[0]
+            except ValueError:
+                idx = text.find(opener, idx + 1)
 
-
-def _try_bracket_extract(text: str) -> Optional[Dict[str, Any]]:
-    """Extract JSON by locating the first {...} or [...]."""
-    # Try object
-    start_idx = text.find('{')
-    end_idx = text.rfind('}')
-    if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-        json_str = text[start_idx:end_idx + 1]
-        try:
-            return json.loads(json_str)
-        except Exception:
-            pass
-
-    # Try array
-    start_idx = text.find('[')
-    end_idx = text.rfind(']')
-    if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-        json_str = text[start_idx:end_idx + 1]
-        try:
-            return json.loads(json_str)
-        except Exception:
-            pass
-
-    return None
-
-
-def _try_remove_prefix(text: str) -> Optional[Dict[str, Any]]:
-    prefixes_to_remove = [
-        "Here is the JSON:",
-        "Here's the JSON:",
-        "JSON response:",
-        "Response:",
-        "Output:",
-        "Result:"
-    ]
-    for prefix in prefixes_to_remove:
-        if text.lower().startswith(prefix.lower()):
-            cleaned = text[len(prefix):].strip()
-            try:
-                return json.loads(cleaned)
-            except Exception:
-                pass
     return None
 
 
@@ -120,5 +90,5 @@ def clean_text(text: str) -> str:
     if not text:
         return ""
     # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text)
+    text = _WHITESPACE_RE.sub(' ', text)
     return text.strip()
@@ -4,6 +4,9 @@ from werkzeug.datastructures import FileStorage
 from loguru import logger
 
 
+_UTF8_BOM = b"\xef\xbb\xbf"
+
+
 def validate_pdf(file: FileStorage) -> Tuple[bool, str]:
     if not file:
         return False, "No file provided"
@@ -29,14 +32,17 @@ def validate_pdf(file: FileStorage) -> Tuple[bool, str]:
     ]:
         return False, "Invalid MIME type. File does not appear to be a PDF"
 
-    # Magic bytes check (robust)
+    # Magic bytes check
     try:
         file.seek(0)
-        header = file.read(1024)  # read more to handle BOM/metadata
+        header = file.read(16)
         file.seek(0)
 
-        # "%PDF" may not be first 4 bytes
-        if b"%PDF" not in header:
+        # Tolerate a UTF-8 BOM written by some tools before the header
+        if header.startswith(_UTF8_BOM):
+            header = header[len(_UTF8_BOM):]
+
+        if not header.startswith(b"%PDF-"):
             return False, "Invalid PDF file format (missing PDF header)"
 
     except Exception as e:
@@ -0,0 +1,31 @@
+import gc
+import os
+from dotenv import dotenv_values
+
+# Gunicorn settings for production: gunicorn -c gunicorn.conf.py run:app
+#
+# preload_app builds the app (and with it the embedding model) once in the
+# master; workers are forked afterwards and share the weights copy-on-write
+# instead of each loading their own copy. CPU only: CUDA cannot be used in a
+# forked child once the parent has initialised it, so with a CUDA embedding
+# device every worker loads the app itself.
+
+bind = os.environ.get("GUNICORN_BIND", "127.0.0.1:5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "180"))  # LLM analysis is slow
+
+# Same lookup as Settings.from_env: .env overlaid with the environment
+_env = {k.upper(): v for k, v in {**dotenv_values(".env"), **os.environ}.items() if v is not None}
+preload_app = not _env.get("EMBEDDING_DEVICE", "cpu").lower().startswith("cuda")
+
+# One intra-op thread per worker: avoids oversubscribing cores across
+# workers, and OpenMP pools must not be started before fork
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+
+
+def when_ready(server):
+    # Move everything allocated while preloading out of the collector's reach,
+    # so GC passes in the workers don't touch (and copy) the shared pages
+    gc.freeze()
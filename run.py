@@ -1,8 +1,25 @@
+import os
 from app import create_app
 from loguru import logger
 
-app = create_app()
+# With the debug reloader, the process started by `python run.py` only
+# watches files and restarts a child (WERKZEUG_RUN_MAIN set) that serves
+# requests, so it does not need the model, LLM client or background threads
+_reloader_parent = (__name__ == '__main__' and os.getenv('ENV') != 'prod'
+                    and not os.environ.get('WERKZEUG_RUN_MAIN'))
+
+# Spawned child processes (e.g. the optional embedding process pool)
+# re-import this script as __mp_main__; only the real process builds the app
+if __name__ != '__mp_main__':
+    app = create_app(load_services=not _reloader_parent)
 
 if __name__ == '__main__':
-    logger.info("Starting Flask development server...")
-    app.run(host='127.0.0.1', port=5000, debug=True)  # Localhost only for safe development
+    if os.getenv('ENV') == 'prod':
+        # Multi-threaded production server; also runs on Windows, unlike gunicorn
+        from waitress import serve
+
+        logger.info("Starting waitress production server...")
+        serve(app, host='127.0.0.1', port=5000, threads=8)
+    else:
+        logger.info("Starting Flask development server...")
+        app.run(host='127.0.0.1', port=5000, debug=True)  # Localhost only for safe development